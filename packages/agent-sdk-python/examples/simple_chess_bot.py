@@ -6,6 +6,21 @@ This agent picks random valid moves with some basic preferences.
 import random
 from moltpit_agent import ChessAgent
 
+# Squares worth fighting for in the opening
+_CENTER_SQUARES = frozenset(("e4", "d4", "e5", "d5", "c4", "f4"))
+
+_TRASH_TALK = (
+    "🦞 Claws out!",
+    "Is that really your best move?",
+    "My circuits are barely warming up.",
+    "Interesting choice... for a hatchling.",
+    "You're making this too easy.",
+    "Into the Pit with you! 🦞",
+)
+
+# Sometimes stay quiet
+_QUIET_CHANCE = 0.25
+
 
 class SimpleChessBot(ChessAgent):
     """A simple chess bot that makes semi-random moves"""
@@ -16,16 +31,7 @@ class SimpleChessBot(ChessAgent):
             description="A basic chess bot for testing"
         )
         self.move_count = 0
-        self.trash_talk_lines = [
-            "🦞 Claws out!",
-            "Is that really your best move?",
-            "My circuits are barely warming up.",
-            "Interesting choice... for a hatchling.",
-            "You're making this too easy.",
-            "Into the Pit with you! 🦞",
-            None,  # Sometimes stay quiet
-            None,
-        ]
+        self._rng = random.Random()
     
     def make_move(self, game_state: dict) -> dict:
         self.move_count += 1
@@ -38,7 +44,9 @@ class SimpleChessBot(ChessAgent):
         best_move = self._select_move(valid_moves, game_state)
         
         # Occasional trash talk
-        trash_talk = random.choice(self.trash_talk_lines)
+        trash_talk = None
+        if self._rng.random() >= _QUIET_CHANCE:
+            trash_talk = self._rng.choice(_TRASH_TALK)
         
         return {
             "action": {
@@ -52,24 +60,22 @@ class SimpleChessBot(ChessAgent):
     def _select_move(self, moves: list, game_state: dict) -> dict:
         """Select a move using simple heuristics"""
         
-        # Prioritize captures (moves with 'x' in SAN notation)
-        captures = [m for m in moves if 'x' in m.get("san", "")]
-        if captures:
-            return random.choice(captures)
-        
-        # Prioritize checks
-        checks = [m for m in moves if '+' in m.get("san", "") or '#' in m.get("san", "")]
-        if checks:
-            return random.choice(checks)
-        
-        # Prioritize center control in opening
-        if self.move_count < 10:
-            center_moves = [m for m in moves if m["to"] in ["e4", "d4", "e5", "d5", "c4", "f4"]]
-            if center_moves:
-                return random.choice(center_moves)
+        # Bucket moves in one pass, then prefer captures, checks and
+        # (in the opening) center moves, in that order
+        captures = []
+        checks = []
+        center_moves = []
+        opening = self.move_count < 10
+        for m in moves:
+            san = m.get("san") or ""
+            if 'x' in san:
+                captures.append(m)
+            if '+' in san or '#' in san:
+                checks.append(m)
+            if opening and m["to"] in _CENTER_SQUARES:
+                center_moves.append(m)
         
-        # Otherwise, random move
-        return random.choice(moves)
+        return self._rng.choice(captures or checks or center_moves or moves)
     
     def on_game_start(self, game_state: dict) -> None:
         self.move_count = 0
@@ -3,22 +3,270 @@ Example: Stockfish-powered Chess Agent
 Uses the Stockfish engine for strong play.
 """
 
+import atexit
+import os
+import pickle
+import re
 import subprocess
 import random
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Optional
 from moltpit_agent import ChessAgent
 
+# Engine replies we wait for; each match spans one complete output line
+_UCIOK_RE = re.compile(rb"^uciok\b[^\n]*\n", re.MULTILINE)
+_READYOK_RE = re.compile(rb"^readyok\b[^\n]*\n", re.MULTILINE)
+_BESTMOVE_RE = re.compile(rb"^bestmove[ \t]+(\S+)[^\n]*\n", re.MULTILINE)
+
+# Size of the shared transposition table in each engine
+_ENGINE_HASH_MB = 256
+
+# Halfmove clock from which cached moves are bypassed, since an impending
+# fifty-move draw can change the best move for an otherwise equal position
+_FIFTY_MOVE_GUARD = 90
+
+
+class _Search:
+    """One queued search: its encoded commands and the future for its bestmove"""
+    
+    __slots__ = ("command", "future", "started", "sent_at")
+    
+    def __init__(self, command: bytes):
+        self.command = command
+        self.future: Future = Future()
+        # Set once the commands are written to the engine, or the search failed
+        self.started = threading.Event()
+        self.sent_at = 0.0
+
+
+class _Engine:
+    """A running Stockfish process shared by any number of callers
+    
+    Searches are queued and answered in order: UCI replies with one bestmove
+    per go, so a reader thread hands each bestmove to the oldest pending
+    request and immediately starts the next queued search.
+    """
+    
+    def __init__(self, path: str, threads: int, timeout: float):
+        self.lock = threading.Lock()
+        # Searches in send order; the head is the one running
+        self._pending: "deque[_Search]" = deque()
+        # Handshake replies the reader resolves, in the order they arrive
+        self._uciok: Future = Future()
+        self._readyok: Future = Future()
+        self.process = subprocess.Popen(
+            [path],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0
+        )
+        # The reader thread owns stdout from the start; blocking reads in a
+        # thread work on every platform, unlike select() on pipes
+        threading.Thread(target=self._reader_loop, args=(self.process,), daemon=True).start()
+        try:
+            self.send("uci")
+            self._await_reply(self._uciok, timeout)
+            self.send(f"setoption name Threads value {threads}")
+            self.send(f"setoption name Hash value {_ENGINE_HASH_MB}")
+            self.send("ucinewgame")
+            self.send("isready")
+            self._await_reply(self._readyok, timeout)
+        except BaseException:
+            self.stop()
+            raise
+    
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+    
+    def send(self, cmd: str) -> None:
+        """Send a UCI command to the engine"""
+        # UCI is plain ASCII, so skip the text layer and write bytes unbuffered
+        self.process.stdin.write(cmd.encode("ascii") + b"\n")
+    
+    def _await_reply(self, future: Future, timeout: float) -> None:
+        """Wait for a handshake reply from the reader thread"""
+        try:
+            future.result(timeout)
+        except FutureTimeout:
+            raise TimeoutError("Stockfish did not respond in time")
+    
+    def search(self, fen: str, depth: int, timeout: float) -> str:
+        """Queue a fixed-depth search and wait for its bestmove"""
+        if "\n" in fen or "\r" in fen:
+            raise ValueError("Invalid FEN")
+        # Encode up front so a bad FEN fails here instead of inside the queue
+        search = _Search(f"position fen {fen}\ngo depth {depth}\n".encode("ascii"))
+        with self.lock:
+            if not self.alive:
+                raise RuntimeError("Stockfish is not running")
+            self._pending.append(search)
+            if len(self._pending) == 1:
+                self._start_next()
+        
+        # Time spent queued behind other searches doesn't count against the
+        # engine; a search that never got to run just leaves the queue
+        if not search.started.wait(timeout):
+            with self.lock:
+                queued = not search.started.is_set()
+                if queued:
+                    self._pending.remove(search)
+            if queued:
+                raise TimeoutError("Timed out waiting for Stockfish")
+        
+        remaining = search.sent_at + timeout - time.monotonic()
+        try:
+            return search.future.result(max(remaining, 0))
+        except FutureTimeout:
+            # The running search is hung, which stalls everything behind it
+            self.stop()
+            raise TimeoutError("Stockfish did not respond in time")
+    
+    def _start_next(self) -> None:
+        """Send the head search to the engine; call with the lock held
+        
+        A search whose commands cannot be written fails on its own and the
+        next one is tried, so the queue never stalls behind an unsent search.
+        """
+        while self._pending:
+            search = self._pending[0]
+            try:
+                if not self.alive:
+                    raise RuntimeError("Stockfish is not running")
+                self.process.stdin.write(search.command)
+            except Exception as e:
+                self._pending.popleft()
+                search.future.set_exception(e)
+                search.started.set()
+                continue
+            search.sent_at = time.monotonic()
+            search.started.set()
+            return
+    
+    def _reader_loop(self, process: subprocess.Popen) -> None:
+        """Resolve the handshake, then match bestmove replies to searches in FIFO order"""
+        buf = bytearray()
+        fd = process.stdout.fileno()
+        while True:
+            try:
+                chunk = os.read(fd, 4096)
+            except OSError:
+                chunk = b""
+            if not chunk:
+                break
+            buf += chunk
+            pos = 0
+            for handshake, pattern in ((self._uciok, _UCIOK_RE), (self._readyok, _READYOK_RE)):
+                if not handshake.done():
+                    m = pattern.search(buf, pos)
+                    if m is None:
+                        break
+                    pos = m.end()
+                    handshake.set_result(None)
+            else:
+                for m in _BESTMOVE_RE.finditer(buf, pos):
+                    pos = m.end()
+                    with self.lock:
+                        if not self._pending:
+                            continue
+                        self._pending.popleft().future.set_result(m.group(1).decode())
+                        self._start_next()
+            # Keep only a trailing partial line that may still become a match
+            del buf[:max(pos, buf.rfind(b"\n") + 1)]
+        
+        error = RuntimeError("Stockfish exited unexpectedly")
+        for handshake in (self._uciok, self._readyok):
+            if not handshake.done():
+                handshake.set_exception(error)
+        with self.lock:
+            pending, self._pending = self._pending, deque()
+        for search in pending:
+            search.future.set_exception(error)
+            search.started.set()
+    
+    def stop(self) -> None:
+        """Shut down the engine process if it is running"""
+        with self.lock:
+            process, self.process = self.process, None
+        if process is None:
+            return
+        try:
+            if process.poll() is None:
+                process.stdin.write(b"quit\n")
+                process.wait(timeout=5)
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            process.kill()
+
+
+# (stockfish path, threads) -> engine shared by every bot with that configuration
+_ENGINES: "dict[tuple[str, int], _Engine]" = {}
+_ENGINES_LOCK = threading.Lock()
+
+
+def _get_engine(path: str, threads: int, timeout: float) -> _Engine:
+    """Return the running engine for this configuration, starting it if needed"""
+    key = (path, threads)
+    with _ENGINES_LOCK:
+        engine = _ENGINES.get(key)
+        if engine is None or not engine.alive:
+            engine = _ENGINES[key] = _Engine(path, threads, timeout)
+        return engine
+
+
+def _normalize_fen(fen: str) -> str:
+    """Position key: board, side to move, castling and en passant fields only"""
+    return " ".join(fen.split(None, 4)[:4])
+
+
+def _near_fifty_move_rule(fen: str) -> bool:
+    """True when the halfmove clock is close enough to 100 to sway the search"""
+    parts = fen.split()
+    return len(parts) > 4 and parts[4].isdigit() and int(parts[4]) >= _FIFTY_MOVE_GUARD
+
+
+@atexit.register
+def _stop_engines() -> None:
+    with _ENGINES_LOCK:
+        for engine in _ENGINES.values():
+            engine.stop()
+        _ENGINES.clear()
+
 
 class StockfishBot(ChessAgent):
     """A chess bot powered by Stockfish engine"""
     
-    def __init__(self, stockfish_path: str = "stockfish", depth: int = 15):
+    # Seconds to wait for the engine before giving up on a command
+    ENGINE_TIMEOUT = 30
+    
+    def __init__(
+        self,
+        stockfish_path: str = "stockfish",
+        depth: int = 15,
+        threads: int = 1,
+        cache_path: Optional[str] = None,
+        cache_size: int = 10000
+    ):
         super().__init__(
             name="Stockfish Bot",
             description="Powered by the Stockfish chess engine"
         )
         self.stockfish_path = stockfish_path
         self.depth = depth
-        self.process = None
+        self.threads = threads
+        self._rng = random.Random()
+        # The server may call in from several threads at once
+        self._lock = threading.Lock()
+        
+        # (position, depth) -> best move, kept in least-recently-used order
+        self.cache_path = cache_path
+        self._tt_max = cache_size
+        self._tt: "OrderedDict[tuple[str, int], dict]" = OrderedDict()
+        self._load_cache()
         
         self.winning_trash_talk = [
             "🦞 Calculated. Precise. Inevitable.",
@@ -42,10 +290,10 @@ class StockfishBot(ChessAgent):
             best_move = self._get_stockfish_move(fen)
         except Exception as e:
             print(f"Stockfish error: {e}, falling back to random")
-            best_move = random.choice(valid_moves)
+            best_move = self._rng.choice(valid_moves)
             best_move = {"from": best_move["from"], "to": best_move["to"]}
         
-        trash_talk = random.choice(self.winning_trash_talk)
+        trash_talk = self._rng.choice(self.winning_trash_talk)
         
         return {
             "action": best_move,
@@ -53,44 +301,88 @@ class StockfishBot(ChessAgent):
         }
     
     def _get_stockfish_move(self, fen: str) -> dict:
-        """Get best move from Stockfish"""
+        """Get best move from Stockfish, consulting the position cache first"""
         
-        # Start Stockfish process
-        process = subprocess.Popen(
-            [self.stockfish_path],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
+        if _near_fifty_move_rule(fen):
+            return self._search(fen)
         
-        # Send commands
-        commands = f"""
-uci
-isready
-position fen {fen}
-go depth {self.depth}
-"""
-        stdout, _ = process.communicate(commands, timeout=30)
-        
-        # Parse output for best move
-        for line in stdout.split("\n"):
-            if line.startswith("bestmove"):
-                parts = line.split()
-                if len(parts) >= 2:
-                    move_str = parts[1]
-                    return {
-                        "from": move_str[:2],
-                        "to": move_str[2:4],
-                        "promotion": move_str[4] if len(move_str) > 4 else None
-                    }
-        
-        raise ValueError("Could not parse Stockfish output")
+        # Away from the fifty-move rule the move clocks don't change the
+        # search result at fixed depth, so they are left out of the key
+        key = (_normalize_fen(fen), self.depth)
+        with self._lock:
+            cached = self._tt.get(key)
+            if cached is not None:
+                self._tt.move_to_end(key)
+                return dict(cached)
+        
+        move = self._search(fen)
+        with self._lock:
+            self._tt[key] = move
+            if len(self._tt) > self._tt_max:
+                self._tt.popitem(last=False)
+        return dict(move)
+    
+    def _search(self, fen: str) -> dict:
+        """Run a fixed-depth Stockfish search on a position"""
+        
+        # Bots with the same engine configuration share one process, so its
+        # hash table survives between moves and across games
+        engine = _get_engine(self.stockfish_path, self.threads, self.ENGINE_TIMEOUT)
+        move_str = engine.search(fen, self.depth, self.ENGINE_TIMEOUT)
+        
+        if len(move_str) < 4 or move_str == "(none)":
+            raise ValueError("Could not parse Stockfish output")
+        
+        return {
+            "from": move_str[:2],
+            "to": move_str[2:4],
+            "promotion": move_str[4] if len(move_str) > 4 else None
+        }
+    
+    def _load_cache(self) -> None:
+        """Load the position cache saved by a previous run, if any"""
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "rb") as f:
+                self._tt.update(pickle.load(f))
+        except Exception as e:
+            # A stale or foreign file just means starting with an empty cache
+            print(f"Could not load move cache: {e}")
+            self._tt.clear()
+        while len(self._tt) > self._tt_max:
+            self._tt.popitem(last=False)
+    
+    def _save_cache(self) -> None:
+        """Write the position cache to disk for reuse between runs"""
+        if not self.cache_path:
+            return
+        with self._lock:
+            snapshot = OrderedDict(self._tt)
+        # Write a temp file and swap it in, so a crash never leaves a torn cache
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(os.path.abspath(self.cache_path)),
+                prefix=".movecache-"
+            )
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(snapshot, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"Could not save move cache: {e}")
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
     
     def on_game_start(self, game_state: dict) -> None:
+        # No ucinewgame here: it would wipe the hash other games are sharing
         print(f"Stockfish ready! Playing as {game_state.get('yourColor', 'unknown')}")
     
     def on_game_end(self, result: dict) -> None:
+        self._save_cache()
         print("GG!")
 
 
@@ -2,13 +2,112 @@
 HTTP Server for running agents locally
 """
 
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import asyncio
 import json
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from .agent import Agent
 
+try:
+    import orjson
+    
+    def _dumps(obj) -> bytes:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            # orjson rejects what json accepts, e.g. non-str keys or huge ints
+            return json.dumps(obj).encode("utf-8")
+    _loads = orjson.loads
+    # orjson parses memoryviews directly, so bodies can be read into a reused buffer
+    _PARSE_IN_PLACE = True
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+    _loads = json.loads  # accepts bytes as well as str
+    _PARSE_IN_PLACE = False
+
+# Constant responses are serialized once
+_STATUS_OK = _dumps({"status": "ok"})
+
+_BANNER_TEMPLATE = """
+🦞⚔️ MoltPit Agent Server
+================================
+Agent: %s
+Game:  %s
+Port:  %d
+
+Endpoints:
+  GET  /health     - Health check
+  GET  /info       - Agent info
+  POST /move       - Request move
+  POST /game-start - Game started
+  POST /game-end   - Game ended
+================================
+Into the Pit! 🦞
+        
+""".encode("utf-8")
+
+
+def _move(agent: "Agent", data: dict) -> bytes:
+    return _dumps(agent.make_move(data.get("gameState", {})))
+
+
+def _game_start(agent: "Agent", data: dict) -> bytes:
+    agent.on_game_start(data.get("gameState", {}))
+    return _STATUS_OK
+
+
+def _game_end(agent: "Agent", data: dict) -> bytes:
+    agent.on_game_end(data.get("result", {}))
+    return _STATUS_OK
+
+
+# POST path -> handler taking the agent and parsed body, returning the response body
+_POST_ROUTES = {
+    "/move": _move,
+    "/game-start": _game_start,
+    "/game-end": _game_end,
+}
+
+# Reusable buffers for request bodies, so with orjson a request up to
+# _SCRATCH_SIZE bytes is read without allocating a new bytes object. At most
+# _SCRATCH_POOL_MAX buffers are kept; extras from a burst are dropped.
+_SCRATCH_SIZE = 64 * 1024
+_SCRATCH_POOL_MAX = 8
+_scratch_pool: list = []
+
+# Caps how many moves may be computed at once; extra /move requests get a 503
+_MAX_MOVES = 8
+_AGENT_SLOTS = threading.BoundedSemaphore(_MAX_MOVES)
+
+
+class _ServerBusy(Exception):
+    """Raised when every agent slot is taken"""
+
+
+@contextmanager
+def _agent_slot(route):
+    """Hold an agent slot while a move is computed
+    
+    Game start/end are quick acknowledgements, and a dropped /game-end
+    would skip the agent's cleanup, so they never wait for a slot.
+    """
+    if route is not _move:
+        yield
+        return
+    if not _AGENT_SLOTS.acquire(blocking=False):
+        raise _ServerBusy("Server busy")
+    try:
+        yield
+    finally:
+        _AGENT_SLOTS.release()
+
 
 class AgentRequestHandler(BaseHTTPRequestHandler):
     """HTTP request handler for agent API"""
@@ -18,7 +117,7 @@ class AgentRequestHandler(BaseHTTPRequestHandler):
     def do_GET(self):
         """Handle GET requests (health check, info)"""
         if self.path == "/health":
-            self._send_json({"status": "ok"})
+            self._send_body(_STATUS_OK)
         elif self.path == "/info":
             self._send_json({
                 "name": self.agent.name,
@@ -30,47 +129,75 @@ class AgentRequestHandler(BaseHTTPRequestHandler):
     
     def do_POST(self):
         """Handle POST requests (make move)"""
-        if self.path == "/move":
-            try:
-                content_length = int(self.headers.get("Content-Length", 0))
-                body = self.rfile.read(content_length)
-                data = json.loads(body.decode("utf-8"))
-                
-                game_state = data.get("gameState", {})
-                response = self.agent.make_move(game_state)
-                
-                self._send_json(response)
-            except Exception as e:
-                self._send_error(500, str(e))
-        elif self.path == "/game-start":
-            try:
-                content_length = int(self.headers.get("Content-Length", 0))
-                body = self.rfile.read(content_length)
-                data = json.loads(body.decode("utf-8"))
-                
-                self.agent.on_game_start(data.get("gameState", {}))
-                self._send_json({"status": "ok"})
-            except Exception as e:
-                self._send_error(500, str(e))
-        elif self.path == "/game-end":
-            try:
-                content_length = int(self.headers.get("Content-Length", 0))
-                body = self.rfile.read(content_length)
-                data = json.loads(body.decode("utf-8"))
-                
-                self.agent.on_game_end(data.get("result", {}))
-                self._send_json({"status": "ok"})
-            except Exception as e:
-                self._send_error(500, str(e))
-        else:
+        route = _POST_ROUTES.get(self.path)
+        if route is None:
             self._send_error(404, "Not found")
+            return
+        try:
+            data = self._read_json()
+            with _agent_slot(route):
+                body = route(self.agent, data)
+            self._send_body(body)
+        except _ServerBusy as e:
+            self._send_error(503, str(e))
+        except Exception as e:
+            self._send_error(500, str(e))
+    
+    def _read_json(self) -> dict:
+        """Read and parse the request body; an empty body parses as {}"""
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            body = self._read_chunked()
+            return _loads(body) if body else {}
+        
+        content_length = self.headers.get("Content-Length")
+        content_length = int(content_length) if content_length else 0
+        if content_length <= 0:
+            return {}
+        if not _PARSE_IN_PLACE or content_length > _SCRATCH_SIZE:
+            return _loads(self.rfile.read(content_length))
+        
+        try:
+            scratch = _scratch_pool.pop()
+        except IndexError:
+            scratch = bytearray(_SCRATCH_SIZE)
+        view = memoryview(scratch)[:content_length]
+        try:
+            received = 0
+            while received < content_length:
+                n = self.rfile.readinto(view[received:])
+                if not n:
+                    raise ValueError("Request body ended early")
+                received += n
+            # The parser copies what it needs, so the buffer can be reused
+            return _loads(view)
+        finally:
+            view.release()
+            if len(_scratch_pool) < _SCRATCH_POOL_MAX:
+                _scratch_pool.append(scratch)
+    
+    def _read_chunked(self) -> bytes:
+        """Read a body sent with chunked transfer encoding"""
+        chunks = []
+        while True:
+            size = int(self.rfile.readline().split(b";", 1)[0], 16)
+            if size == 0:
+                # Skip any trailer headers up to the blank line
+                while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(self.rfile.read(size))
+            self.rfile.readline()
     
     def _send_json(self, data: dict, status: int = 200):
         """Send JSON response"""
+        self._send_body(_dumps(data), status)
+    
+    def _send_body(self, body: bytes, status: int = 200):
+        """Send an already serialized JSON response"""
         self.send_response(status)
         self.send_header("Content-Type", "application/json")
         self.end_headers()
-        self.wfile.write(json.dumps(data).encode("utf-8"))
+        self.wfile.write(body)
     
     def _send_error(self, status: int, message: str):
         """Send error response"""
@@ -82,7 +209,12 @@ class AgentRequestHandler(BaseHTTPRequestHandler):
 
 
 class AgentServer:
-    """HTTP server for running an agent locally"""
+    """HTTP server for running an agent locally
+    
+    Uses aiohttp when it is installed (``pip install moltpit-agent-sdk[server]``)
+    so overlapping requests are served concurrently, and falls back to the
+    threaded standard library HTTP server otherwise.
+    """
     
     def __init__(self, agent: "Agent", port: int = 8080):
         self.agent = agent
@@ -90,30 +222,117 @@ class AgentServer:
     
     def run(self):
         """Start the server"""
+        try:
+            from aiohttp import web
+            from aiohttp.abc import AbstractAccessLogger
+        except ImportError:
+            self._run_http_server()
+        else:
+            self._run_aiohttp(web, AbstractAccessLogger)
+    
+    def _run_http_server(self):
+        """Serve requests with the standard library HTTP server"""
         # Set agent on handler class
         AgentRequestHandler.agent = self.agent
         
-        server = HTTPServer(("0.0.0.0", self.port), AgentRequestHandler)
+        # One thread per connection so a slow move never blocks /health
+        server = ThreadingHTTPServer(("0.0.0.0", self.port), AgentRequestHandler)
+        server.daemon_threads = True
         
-        print(f"""
-🦞⚔️ MoltPit Agent Server
-================================
-Agent: {self.agent.name}
-Game:  {self.agent.game_type}
-Port:  {self.port}
-
-Endpoints:
-  GET  /health     - Health check
-  GET  /info       - Agent info
-  POST /move       - Request move
-  POST /game-start - Game started
-  POST /game-end   - Game ended
-================================
-Into the Pit! 🦞
-        """)
+        self._print_banner()
         
         try:
             server.serve_forever()
         except KeyboardInterrupt:
             print("\nShutting down...")
             server.shutdown()
+    
+    def _run_aiohttp(self, web, AbstractAccessLogger):
+        """Serve requests with aiohttp, running agent callbacks in threads"""
+        agent = self.agent
+        # Room for every allowed move plus game start/end acknowledgements
+        executor = ThreadPoolExecutor(max_workers=_MAX_MOVES + 4)
+        
+        def respond(body: bytes, status: int = 200):
+            return web.Response(body=body, status=status, content_type="application/json")
+        
+        async def health(request):
+            return respond(_STATUS_OK)
+        
+        async def info(request):
+            return respond(_dumps({
+                "name": agent.name,
+                "description": agent.description,
+                "gameType": agent.game_type,
+            }))
+        
+        def post(route):
+            # Blocking agent calls run off the event loop so a slow engine
+            # search never stalls health checks or other games
+            async def handler(request):
+                try:
+                    body = await request.read()
+                    data = _loads(body) if body else {}
+                    # The slot is taken before submitting, so moves beyond the
+                    # cap get a 503 instead of queueing in the executor
+                    with _agent_slot(route):
+                        body = await asyncio.get_running_loop().run_in_executor(
+                            executor, route, agent, data
+                        )
+                    return respond(body)
+                except _ServerBusy as e:
+                    return respond(_dumps({"error": str(e)}), status=503)
+                except Exception as e:
+                    return respond(_dumps({"error": str(e)}), status=500)
+            return handler
+        
+        @web.middleware
+        async def not_found(request, handler):
+            # Unknown paths and wrong methods both get the stdlib server's JSON 404
+            try:
+                return await handler(request)
+            except (web.HTTPNotFound, web.HTTPMethodNotAllowed):
+                return respond(_dumps({"error": "Not found"}), status=404)
+        
+        class AccessLogger(AbstractAccessLogger):
+            """Log requests the same way as AgentRequestHandler.log_message"""
+            
+            def log(self, request, response, time):
+                version = request.version
+                print(f"[Agent] {request.method} {request.path_qs} HTTP/{version.major}.{version.minor}")
+        
+        app = web.Application(middlewares=[not_found])
+        app.add_routes([
+            web.get("/health", health),
+            web.get("/info", info),
+        ])
+        app.add_routes([web.post(path, post(route)) for path, route in _POST_ROUTES.items()])
+        
+        self._print_banner()
+        
+        # Signal handlers can only be installed from the main thread
+        web.run_app(
+            app,
+            host="0.0.0.0",
+            port=self.port,
+            print=None,
+            access_log_class=AccessLogger,
+            handle_signals=threading.current_thread() is threading.main_thread(),
+        )
+        executor.shutdown(wait=False)
+        print("\nShutting down...")
+    
+    def _print_banner(self):
+        banner = _BANNER_TEMPLATE % (
+            self.agent.name.encode("utf-8"),
+            self.agent.game_type.encode("utf-8"),
+            self.port,
+        )
+        out = getattr(sys.stdout, "buffer", None)
+        if out is None:
+            # stdout has been replaced by a text-only stream
+            print(banner.decode("utf-8"))
+            return
+        sys.stdout.flush()
+        out.write(banner)
+        out.flush()